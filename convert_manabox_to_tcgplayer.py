@@ -5,7 +5,7 @@ from tkinter import Tk, Toplevel, Listbox, Button, Label, Frame, messagebox, Scr
 from tkinter.filedialog import askopenfilename
 import tkinter.font as tkFont
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
 # Option to filter out prerelease cards
 FILTER_PRERELEASE = True  # Exclude prerelease cards
@@ -57,6 +57,52 @@ def is_double_sided_candidate(product_name):
     return '//' in pn or ('double' in pn and 'sided' in pn)
 
 
+def build_dfc_side_index(reference_data):
+    """Build a per-set index of every face name of every double-sided token.
+
+    Returns a dict mapping a lowercased set name to a tuple of
+    (side_names, side_keys) where side_names[i] is a normalized face name
+    and side_keys[i] is the reference key it belongs to.
+    """
+    index = {}
+    for key, row in reference_data.items():
+        prod_name = row.get("Product Name", "")
+        set_name = row.get("Set Name", "")
+        if "token" not in set_name.lower() and "token" not in prod_name.lower():
+            continue
+        if not is_double_sided_candidate(prod_name):
+            continue
+        side_names, side_keys = index.setdefault(set_name.lower(), ([], []))
+        for side in prod_name.split("//"):
+            side = re.sub(r"doubled?-sided token", "", side, flags=re.IGNORECASE).strip()
+            side_names.append(side.lower())
+            side_keys.append(key)
+    return index
+
+
+def find_dfc_side_matches(scanned_name, side_index, token_set_name, token_set_base):
+    """Rank double-sided tokens from the given set by their best matching face."""
+    side_names = []
+    side_keys = []
+    for set_name, (names, keys) in side_index.items():
+        if token_set_name.lower() in set_name or token_set_base in set_name:
+            side_names.extend(names)
+            side_keys.extend(keys)
+    if not side_names:
+        return []
+    scanned_lower = scanned_name.lower()
+    results = process.extract(scanned_lower, side_names, scorer=fuzz.ratio, processor=None, limit=None)
+    best = {}
+    qualifies = set()
+    # Results come back sorted by score, so the first hit per key is its best face.
+    for side_name, score, idx in results:
+        key = side_keys[idx]
+        best.setdefault(key, score)
+        if score > 70 or scanned_lower in side_name:
+            qualifies.add(key)
+    return [(key, score) for key, score in best.items() if key in qualifies]
+
+
 def get_market_price(manabox_row, ref_row=None):
     """Determine a valid market price using multiple candidate fields."""
     candidate_fields = ["TCG Marketplace Price", "List Price", "Retail Price"]
@@ -374,7 +420,7 @@ def build_token_fallback(token_set_name, token_product_name, card_number, manabo
     }
 
 
-def map_fields(manabox_row, card_database):
+def map_fields(manabox_row, card_database, dfc_side_index):
     """Convert a row from the Manabox CSV into the TCGplayer staged inventory format."""
     card_name = manabox_row.get("Name", "").strip()
     set_name = manabox_row.get("Set name", "").strip()
@@ -389,7 +435,7 @@ def map_fields(manabox_row, card_database):
             (set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name))
     )
     if is_token:
-        return process_token(manabox_row, card_database, condition, card_name, set_name)
+        return process_token(manabox_row, card_database, dfc_side_index, condition, card_name, set_name)
     else:
         return process_standard(manabox_row, card_database, condition, card_name, set_name)
 
@@ -421,7 +467,7 @@ def process_standard(manabox_row, card_database, condition, card_name, set_name)
         return None
 
 
-def process_token(manabox_row, card_database, condition, card_name, set_name):
+def process_token(manabox_row, card_database, dfc_side_index, condition, card_name, set_name):
     """Process a token card row."""
     if set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name):
         token_set_name = set_name[1:] + " tokens"
@@ -458,19 +504,8 @@ def process_token(manabox_row, card_database, condition, card_name, set_name):
             f"Token '{card_name}' from set '{set_name}' does not indicate two sides. Is it a double sided token?"
         )
         if is_ds:
-            ds_candidates = []
-            scanned_lower = card_name.lower()
-            for k, v in token_ref_data.items():
-                prod_name = v.get("Product Name", "")
-                if is_double_sided_candidate(prod_name):
-                    sides = prod_name.split("//")
-                    sides = [re.sub(r"doubled?-sided token", "", s, flags=re.IGNORECASE).strip() for s in sides]
-                    if any(scanned_lower in side.lower() for side in sides) or any(
-                            fuzz.ratio(scanned_lower, side.lower()) > 70 for side in sides):
-                        scores = [fuzz.ratio(scanned_lower, side.lower()) for side in sides]
-                        ds_candidates.append((k, max(scores)))
+            ds_candidates = find_dfc_side_matches(card_name, dfc_side_index, token_set_name, token_set_base)
             if ds_candidates:
-                ds_candidates.sort(key=lambda x: x[1], reverse=True)
                 confirm_match_gui(normalized_token_key, ds_candidates, token_ref_data,
                                   title="Select Double Sided Token")
             else:
@@ -539,6 +574,8 @@ manabox_csv = select_csv_file("Select the Manabox CSV File")
 reference_csv = select_csv_file("Select the TCGPlayer Reference CSV File")
 tcgplayer_csv = "tcgplayer_staged_inventory.csv"
 ref_data = load_reference_data(reference_csv)
+# The side index is derived from ref_data; rebuild it whenever ref_data is reloaded.
+dfc_side_index = build_dfc_side_index(ref_data)
 
 try:
     with open(manabox_csv, mode='r', newline='', encoding='utf-8') as infile, \
@@ -552,7 +589,7 @@ try:
         writer.writeheader()
         cards = []
         for row in reader:
-            tcgplayer_row = map_fields(row, ref_data)
+            tcgplayer_row = map_fields(row, ref_data, dfc_side_index)
             if tcgplayer_row:
                 cards.append(tcgplayer_row)
         merged_cards = merge_entries(cards)